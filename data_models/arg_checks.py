@@ -0,0 +1,82 @@
+# Per-type argument checks used by OperationDef.validate_args.
+# Kept free of pydantic imports and fully annotated so the module can be compiled with mypyc
+# (see README); the compiled extension is picked up transparently by the normal import.
+#
+# Each check takes the argument name, the argument's precomputed spec (see arg_spec) and the provided value,
+# so validating a step never reads attributes off the ArgDef models.
+from typing import Any, Callable, Dict
+
+
+def arg_spec(a: Any) -> Any:
+    """ The part of an ArgDef its check needs: (options, option set), (min, max), encodings, or None """
+    if a.type == "enum":
+        return a.options, frozenset(a.options)
+    if a.type == "number":
+        return a.min, a.max
+    if a.type == "bytes":
+        return a.encodings
+    return None
+
+
+def check_enum(name: str, spec: Any, v: Any) -> None:
+    options, option_set = spec
+    try:
+        ok = v in option_set
+    except TypeError:  # unhashable values (dicts, lists) can never equal a string option
+        ok = False
+    if not ok:
+        raise ValueError(f"{name} must be one of {options}, got {v!r}")
+
+
+def check_number(name: str, bounds: Any, v: Any) -> None:
+    if not isinstance(v, (int, float)):
+        raise ValueError(f"{name} must be number")
+    lo, hi = bounds
+    if lo is not None and v < lo:
+        raise ValueError(f"{name} < {lo}")
+    if hi is not None and v > hi:
+        raise ValueError(f"{name} > {hi}")
+
+
+def check_string(name: str, _spec: Any, v: Any) -> None:
+    if not isinstance(v, str):
+        raise ValueError(f"{name} must be string")
+
+
+def check_boolean(name: str, _spec: Any, v: Any) -> None:
+    if not isinstance(v, bool):
+        raise ValueError(f"{name} must be boolean")
+
+
+_MISSING = object()
+
+
+def check_bytes(name: str, encodings: Any, v: Any) -> None:
+    # Accept canonical object {value: <...>, encoding?: <...>} or raw bytes/str for backward compatibility.
+    if type(v) is str or type(v) is bytes:
+        return
+    if isinstance(v, dict):
+        val = v.get("value", _MISSING)
+        if val is _MISSING:
+            raise ValueError(f"{name} must include 'value' when provided as an object")
+        enc = v.get("encoding")
+        if enc is not None:
+            if encodings and enc not in encodings:
+                raise ValueError(f"{name}.encoding must be one of {encodings}, got {enc!r}")
+            if not isinstance(enc, str):
+                raise ValueError(f"{name}.encoding must be string when provided")
+        # value can be str or bytes; deeper conversion handled elsewhere
+        if not isinstance(val, (str, bytes)):
+            raise ValueError(f"{name}.value must be string or bytes")
+    elif not isinstance(v, (bytes, str)):
+        raise ValueError(f"{name} must be bytes/string or object with 'value' and optional 'encoding'")
+
+
+# Per-type argument checks, looked up by the ArgDef "type" tag
+VALIDATORS: Dict[str, Callable[[str, Any, Any], None]] = {
+    "enum": check_enum,
+    "number": check_number,
+    "string": check_string,
+    "boolean": check_boolean,
+    "bytes": check_bytes,
+}
@@ -0,0 +1,25 @@
+# Location and loader of the bundled CyberChef operations catalog, shared by the server and
+# utils/build_catalog_cache.py so both see the same (interned) operation names.
+# Importing this module reads nothing; load_operations does the work.
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+import orjson
+
+CATALOG_DIR = Path(__file__).resolve().parent.parent / 'utils' / 'js'
+CATALOG_JSON = CATALOG_DIR / 'operations.json'
+# Written by `python -m utils.build_catalog_cache`; used instead of the JSON while it is newer than it
+CATALOG_SNAPSHOT = CATALOG_DIR / 'operations.pickle'
+
+
+def intern_names(catalog: Dict[str, Any]) -> Dict[str, Any]:
+    """ The same mapping, keyed by interned op names (unpickling does not intern them) """
+    return {sys.intern(name): value for name, value in catalog.items()}
+
+
+def load_operations() -> Dict[str, Any]:
+    """ The JSON was made half manually because it is not very clean on the CyberChef side """
+    with open(CATALOG_JSON, "rb") as f:
+        # Op names are the lookup keys for every search result and recipe step
+        return intern_names(orjson.loads(f.read()))
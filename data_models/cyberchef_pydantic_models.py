@@ -1,16 +1,30 @@
-from typing import Any, Dict, List, Literal, Optional, Union, Annotated
-from pydantic import BaseModel, Field, model_validator
+import hashlib
+import os
+import pickle
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, Type, Union, Annotated
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, TypeAdapter, ValidationError, model_validator
+from pydantic import VERSION as PYDANTIC_VERSION
+from pydantic_core import SchemaValidator, core_schema
 import re
+import sys
 
+from data_models.arg_checks import VALIDATORS as _VALIDATORS, arg_spec
 
-class EnumArgDef(BaseModel):
+
+class _FrozenArgDef(BaseModel):
+    # Argument definitions are shared by every request once the catalog is loaded, so nothing may modify them
+    model_config = ConfigDict(frozen=True)
+
+
+class EnumArgDef(_FrozenArgDef):
     type: Literal["enum"]
     name: str
     options: List[str] = Field(default_factory=list)
     required: bool = False
 
 
-class NumberArgDef(BaseModel):
+class NumberArgDef(_FrozenArgDef):
     type: Literal["number"]
     name: str
     min: Optional[Union[int, float]] = None
@@ -18,25 +32,27 @@ class NumberArgDef(BaseModel):
     required: bool = False
 
 
-class StringArgDef(BaseModel):
+class StringArgDef(_FrozenArgDef):
     type: Literal["string"]
     name: str
     required: bool = False
 
 
-class BooleanArgDef(BaseModel):
+class BooleanArgDef(_FrozenArgDef):
     type: Literal["boolean"]
     name: str
     required: bool = False
 
 
-class BytesArgDef(BaseModel):
+class BytesArgDef(_FrozenArgDef):
     type: Literal["bytes"]
     name: str
     encodings: List[str] = Field(default_factory=list)
     required: bool = False
 
 
+# Tagged on "type": pydantic-core picks the variant with a single tag lookup instead of trying each member in turn.
+# The bulk catalog pass in build_registry (_CATALOG_ADAPTER) relies on this, so keep every variant tag a plain Literal.
 ArgDef = Annotated[
     Union[
         EnumArgDef, NumberArgDef, StringArgDef, BooleanArgDef, BytesArgDef],
@@ -46,6 +62,8 @@ ArgDef = Annotated[
 _FLAG_MAP = {"i": re.I, "m": re.M, "s": re.S, "x": re.X, "a": re.A, "u": re.U}
 
 
+# Catalog checks only use a handful of distinct flag strings ("", "i", "gm", ...)
+@lru_cache(maxsize=64)
 def _flags(s: str) -> int:
     f = 0
     for ch in s:
@@ -58,8 +76,16 @@ class RegexCheck(BaseModel):
     flags: str = ""
     args: List[Any] = Field(default_factory=list)
 
+    _compiled: Optional[re.Pattern] = PrivateAttr(default=None)
+
     def compile(self) -> re.Pattern:
-        return re.compile(self.pattern, _flags(self.flags))
+        if self._compiled is None:
+            self._compiled = re.compile(self.pattern, _flags(self.flags))
+        return self._compiled
+
+
+# Per-operation arg columns: name -> index, names, checks, specs (see arg_spec), bitmask of required arg indexes
+_ArgColumns = Tuple[Dict[str, int], Tuple[str, ...], Tuple[Callable[[str, Any, Any], None], ...], Tuple[Any, ...], int]
 
 
 class OperationDef(BaseModel):
@@ -71,74 +97,157 @@ class OperationDef(BaseModel):
     args: List[ArgDef] = Field(default_factory=list)
     checks: List[RegexCheck] = Field(default_factory=list)
 
-    model_config = dict(populate_by_name=True)
+    # Explicit so the long-running server never pays for schema building or re-validation on the request path:
+    # the core schema is built when the class is defined, and registry instances are trusted when passed back in
+    model_config = ConfigDict(populate_by_name=True, defer_build=False, revalidate_instances="never", extra="ignore")
+
+    # Arg columns built once in model_post_init, kept in a single private attribute because every private attribute
+    # read goes through BaseModel.__getattr__
+    _columns: _ArgColumns = PrivateAttr(default=({}, (), (), (), 0))
+
+    def model_post_init(self, __context: Any) -> None:
+        names = tuple(a.name for a in self.args)
+        self._columns = (
+            {name: i for i, name in enumerate(names)},
+            names,
+            tuple(_VALIDATORS[a.type] for a in self.args),
+            tuple(arg_spec(a) for a in self.args),
+            sum(1 << i for i, a in enumerate(self.args) if a.required),
+        )
 
     def validate_args(self, provided: Dict[str, Any]) -> Dict[str, Any]:
-        names = {a.name for a in self.args}
-        unknown = set(provided) - names
+        index, names, checks, specs, required_mask = self._columns
+
+        # Most recipe steps pass no args at all (From Base64, Gunzip, To Hex, ...)
+        if not provided:
+            if required_mask:
+                raise ValueError(f"missing required arg: {names[_lowest_bit(required_mask)]}")
+            return provided
+
+        unknown = provided.keys() - index.keys()
         if unknown:
             raise ValueError(f"unknown args: {sorted(unknown)}")
+        if required_mask:
+            missing = required_mask
+            for name in provided:
+                missing &= ~(1 << index[name])
+            if missing:
+                # Report the first missing arg in declaration order
+                raise ValueError(f"missing required arg: {names[_lowest_bit(missing)]}")
 
-        # Validate required args and types
-        for a in self.args:
-            has = a.name in provided
-            if getattr(a, "required", False) and not has:
-                raise ValueError(f"missing required arg: {a.name}")
-            if not has:
-                continue
-
-            v = provided[a.name]
-            if isinstance(a, EnumArgDef):
-                if v not in a.options:
-                    raise ValueError(f"{a.name} must be one of {a.options}, got {v!r}")
-            elif isinstance(a, NumberArgDef):
-                if not isinstance(v, (int, float)):
-                    raise ValueError(f"{a.name} must be number")
-                if a.min is not None and v < a.min:
-                    raise ValueError(f"{a.name} < {a.min}")
-                if a.max is not None and v > a.max:
-                    raise ValueError(f"{a.name} > {a.max}")
-            elif isinstance(a, StringArgDef):
-                if not isinstance(v, str):
-                    raise ValueError(f"{a.name} must be string")
-            elif isinstance(a, BooleanArgDef):
-                if not isinstance(v, bool):
-                    raise ValueError(f"{a.name} must be boolean")
-            elif isinstance(a, BytesArgDef):
-                # Accept canonical object {value: <...>, encoding?: <...>} or raw bytes/str for backward compatibility.
-                if isinstance(v, dict):
-                    if "value" not in v:
-                        raise ValueError(f"{a.name} must include 'value' when provided as an object")
-                    enc = v.get("encoding")
-                    if enc is not None:
-                        if a.encodings and enc not in a.encodings:
-                            raise ValueError(f"{a.name}.encoding must be one of {a.encodings}, got {enc!r}")
-                        if not isinstance(enc, str):
-                            raise ValueError(f"{a.name}.encoding must be string when provided")
-                    # value can be str or bytes; deeper conversion handled elsewhere
-                    val = v["value"]
-                    if not isinstance(val, (str, bytes)):
-                        raise ValueError(f"{a.name}.value must be string or bytes")
-                elif not isinstance(v, (bytes, str)):
-                    raise ValueError(f"{a.name} must be bytes/string or object with 'value' and optional 'encoding'")
+        # Validate types of the provided args only
+        for name, v in provided.items():
+            i = index[name]
+            checks[i](name, specs[i], v)
         return provided
 
 
-def load_definitions(operations):
+def _lowest_bit(mask: int) -> int:
+    return (mask & -mask).bit_length() - 1
+
+
+_CATALOG_ADAPTER = TypeAdapter(Dict[str, OperationDef])
+
+
+def _check_step(op_registry: Dict[str, OperationDef], op: str, args: Dict[str, Any]) -> None:
+    d = op_registry.get(op)
+    if not d:
+        raise ValueError(f"unknown op {op!r}; allowed: {sorted(op_registry.keys())}")
+    d.validate_args(args)
+
+
+# Shape of one recipe step: {op: str, args?: {str: any}}
+_STEP_SCHEMA = core_schema.typed_dict_schema({
+    "op": core_schema.typed_dict_field(core_schema.str_schema()),
+    "args": core_schema.typed_dict_field(
+        core_schema.with_default_schema(
+            core_schema.dict_schema(core_schema.str_schema(), core_schema.any_schema()), default_factory=dict),
+        required=False),
+})
+
+
+def build_step_validator(op_registry: Dict[str, OperationDef]) -> SchemaValidator:
+    """ Validator for one recipe step as a plain {op, args} dict, checked against the catalog without a BaseModel """
+    def _validate_against_catalog(step: Dict[str, Any]) -> Dict[str, Any]:
+        _check_step(op_registry, step["op"], step["args"])
+        return step
+
+    schema = core_schema.no_info_after_validator_function(_validate_against_catalog, _STEP_SCHEMA)
+    return SchemaValidator(schema, core_schema.CoreConfig(title="CyberChefRecipeOperation"))
 
-    # operations is expected to be a list of operation dicts (as per utils/js/cyberchef_operations_definitions.json)
-    op_registry: Dict[str, OperationDef] = {}
+
+def _intern_strings(operations) -> None:
+    # In place: option labels (e.g. "UTF-8", "Space", "Line feed"), arg names and type tags repeat across many
+    # operations; pydantic keeps the str objects it is given, so the catalog and its OperationDefs then share one each
+    for op_def in operations.values():
+        for a in op_def.get("args") or []:
+            for key in ("name", "type"):
+                if isinstance(a.get(key), str):
+                    a[key] = sys.intern(a[key])
+            if isinstance(a.get("options"), list):
+                a["options"] = [sys.intern(o) if isinstance(o, str) else o for o in a["options"]]
+
+
+def _structural_problem(op_def) -> Optional[str]:
+    # Cheap shape check with plain dict access, so broken entries never reach (and fail) the bulk validation
+    if not isinstance(op_def, dict):
+        return "not an object"
+    for key in ("module", "inputType", "outputType"):
+        if not isinstance(op_def.get(key), str):
+            return f"missing {key!r}"
+    args = op_def.get("args") or []
+    if not isinstance(args, list):
+        return "'args' is not a list"
+    for a in args:
+        if not isinstance(a, dict) or not isinstance(a.get("type"), str) or a["type"] not in _VALIDATORS:
+            return f"arg {a.get('name') if isinstance(a, dict) else a!r} has an unsupported type"
+    return None
+
+
+def build_registry(operations) -> Dict[str, OperationDef]:
+
+    # operations is expected to be a dict of operation name -> operation dict (as in utils/js/operations.json)
+    skipped: Dict[str, str] = {}
+    valid: Dict[str, Any] = {}
     for op_name, op_def in operations.items():
-        # noinspection PyBroadException
-        try:
-            # Parse using Pydantic; infoUrl is supported via alias in OperationDef
-            opdef = OperationDef.model_validate(op_def)
-            # name = op_def.get("name")
-            # if not name:
-            #     raise ValueError("operation missing 'name'")
-            op_registry[op_name] = opdef
-        except Exception as e:
-            print(f"Could not add operation: {op_def.get('name')}: {e}")
+        problem = _structural_problem(op_def)
+        if problem:
+            skipped[op_name] = problem
+        else:
+            valid[op_name] = op_def
+    _intern_strings(valid)
+
+    try:
+        # Validate the whole catalog in a single pydantic-core call; infoUrl is supported via alias in OperationDef
+        op_registry: Dict[str, OperationDef] = _CATALOG_ADAPTER.validate_python(valid)
+    except ValidationError as e:
+        # Drop the operations the shape check missed (first loc item is the operation name) and validate the rest
+        for err in e.errors():
+            skipped.setdefault(str(err["loc"][0]), err["msg"])
+        op_registry = _CATALOG_ADAPTER.validate_python({k: v for k, v in valid.items() if k not in skipped})
+
+    if skipped:
+        print(f"Could not add {len(skipped)} operations: " + "; ".join(f"{k}: {v}" for k, v in skipped.items()))
+
+    # Compile every check pattern once up front so later matching never goes through re.compile
+    for op_name, opdef in op_registry.items():
+        for check in opdef.checks:
+            try:
+                check.compile()
+            except re.error as e:
+                print(f"Could not compile check for operation {op_name}: {e}")
+    return op_registry
+
+
+def load_definitions(operations, op_registry: Optional[Dict[str, OperationDef]] = None) -> Type[BaseModel]:
+    """
+    Compatibility wrapper: a CyberChefRecipeOperation model class validating {op, args} against the catalog.
+    The service itself uses build_registry and build_step_validator, which skip building a model class; every call
+    here builds a new one, so keep the result instead of calling it per request
+    """
+    # op_registry can be passed in when it was already built, e.g. from a catalog snapshot
+    if op_registry is None:
+        op_registry = build_registry(operations)
 
     class CyberChefRecipeOperation(BaseModel):
         op: str
@@ -146,10 +255,46 @@ def load_definitions(operations):
 
         @model_validator(mode="after")
         def _validate_against_catalog(self):
-            d = op_registry.get(self.op)
-            if not d:
-                raise ValueError(f"unknown op {self.op!r}; allowed: {sorted(op_registry.keys())}")
-            d.validate_args(self.args)
+            _check_step(op_registry, self.op, self.args)
             return self
 
     return CyberChefRecipeOperation
+
+
+# Source files whose code decides what a pickled OperationDef looks like (its columns come from arg_spec/VALIDATORS)
+_SNAPSHOT_SOURCES = ("cyberchef_pydantic_models.py", "arg_checks.py")
+
+
+def _snapshot_format() -> Tuple[str, str]:
+    """ Key under which a snapshot is valid: the pydantic version and a hash of the model sources """
+    digest = hashlib.sha256()
+    for name in _SNAPSHOT_SOURCES:
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), name), "rb") as f:
+            digest.update(f.read())
+    return PYDANTIC_VERSION, digest.hexdigest()
+
+
+def dump_catalog_snapshot(operations, path) -> None:
+    """ Pickle the raw catalog together with its OperationDefs so a later start can skip parsing and validation """
+    op_registry = build_registry(operations)
+    with open(path, "wb") as f:
+        # The format key goes first so a snapshot written by other code or another pydantic version is rejected before
+        # unpickling models whose private state it would not understand
+        pickle.dump(_snapshot_format(), f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump((operations, op_registry), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_catalog_snapshot(path, source_path) -> Optional[Tuple[Dict[str, Any], Dict[str, OperationDef]]]:
+    """ Return (operations, op_registry) from dump_catalog_snapshot, or None if it is missing, older than source_path
+    or was written by a different version of the models """
+    # noinspection PyBroadException
+    try:
+        if os.path.getmtime(path) < os.path.getmtime(source_path):
+            return None
+        with open(path, "rb") as f:
+            if pickle.load(f) != _snapshot_format():
+                return None
+            operations, op_registry = pickle.load(f)
+    except Exception:
+        return None
+    return operations, op_registry
@@ -1,10 +1,10 @@
 import asyncio
 # import logging
+from typing import TYPE_CHECKING
 
-from autogen_agentchat.agents import AssistantAgent
-from autogen_core.models import ModelFamily
-from autogen_ext.models.openai import OpenAIChatCompletionClient
-from autogen_ext.tools.mcp import StreamableHttpServerParams, McpWorkbench
+# autogen pulls in large pydantic model graphs at import time; import it where it is used instead
+if TYPE_CHECKING:
+    from autogen_ext.tools.mcp import StreamableHttpServerParams
 
 # from monitoring import setup_logging
 
@@ -109,11 +109,18 @@ Examples (structure only; ALWAYS confirm op via search_operations first; then ba
 SYSTEM_MESSAGE = SYSTEM_MESSAGE + "\nReply with TERMINATE when done."
 
 
+_UNSUPPORTED_SCHEMA_KEYS = frozenset({"$defs", "definitions", "$ref", "anyOf", "oneOf", "allOf"})
+
+
 def _sanitize_json_schema(schema: dict) -> dict:
-    # Recursively sanitize a JSON Schema to remove unsupported refs/combiner keywords for OpenAI tools
+    # Recursively sanitize a JSON Schema to remove unsupported refs/combiner keywords for OpenAI tools.
+    # Nodes are only copied when they or something below them change; clean subtrees are returned as-is.
     def sanitize(node):
         if isinstance(node, dict):
-            node = dict(node)  # shallow copy
+            # Only copy when this node holds a keyword we rewrite; otherwise the block below never writes
+            copied = not _UNSUPPORTED_SCHEMA_KEYS.isdisjoint(node)
+            if copied:
+                node = dict(node)  # shallow copy
             # Drop unsupported/difficult features
             node.pop("$defs", None)
             node.pop("definitions", None)
@@ -139,13 +146,30 @@ def _sanitize_json_schema(schema: dict) -> dict:
                 # Fall back to permissive object to avoid server-side conversion failures
                 node.setdefault("type", "object")
             # Recurse properties and items
-            if "properties" in node and isinstance(node["properties"], dict):
-                node["properties"] = {k: sanitize(v) for k, v in node["properties"].items()}
+            props = node.get("properties")
+            if isinstance(props, dict):
+                new_props = None
+                for k, v in props.items():
+                    sv = sanitize(v)
+                    if sv is not v:
+                        if new_props is None:
+                            new_props = dict(props)
+                        new_props[k] = sv
+                if new_props is not None:
+                    if not copied:
+                        node = dict(node)
+                        copied = True
+                    node["properties"] = new_props
             if "items" in node:
-                node["items"] = sanitize(node["items"])
+                items = sanitize(node["items"])
+                if items is not node["items"]:
+                    if not copied:
+                        node = dict(node)
+                    node["items"] = items
             return node
         elif isinstance(node, list):
-            return [sanitize(x) for x in node]
+            out = [sanitize(x) for x in node]
+            return node if all(a is b for a, b in zip(out, node)) else out
         else:
             return node
 
@@ -153,7 +177,9 @@ def _sanitize_json_schema(schema: dict) -> dict:
 
 
 class SanitizingWorkbench:
-    def __init__(self, server_params: StreamableHttpServerParams):
+    def __init__(self, server_params: "StreamableHttpServerParams"):
+        from autogen_ext.tools.mcp import McpWorkbench
+
         self._wb = McpWorkbench(server_params=server_params)
 
     async def __aenter__(self):
@@ -184,6 +210,11 @@ class SanitizingWorkbench:
 
 
 async def main() -> None:
+    from autogen_agentchat.agents import AssistantAgent
+    from autogen_core.models import ModelFamily
+    from autogen_ext.models.openai import OpenAIChatCompletionClient
+    from autogen_ext.tools.mcp import StreamableHttpServerParams
+
     # Configure multiple MCP servers
     cyberchef_mcp_params = StreamableHttpServerParams(url="http://localhost:3002/mcp")
 
@@ -265,4 +296,5 @@ async def main() -> None:
         print("=" * 50)
 
 
-asyncio.run(main())
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,45 +1,50 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 import json
-import os
-from collections import Counter, defaultdict
-from pathlib import Path
-from typing import Any, Dict, List, TypeAlias
-from urllib.error import HTTPError
+import logging
+from bisect import bisect_left
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 import argparse
 import sys
+import threading
+from functools import lru_cache
 
+import numpy as np
+import orjson
 import requests
 from mcp.server.fastmcp import FastMCP
-from pydantic import ValidationError, BaseModel
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from pydantic import ValidationError
 
 from rapidfuzz import fuzz, utils, process
 
-from data_models.cyberchef_pydantic_models import load_definitions
+from data_models.catalog import CATALOG_JSON, CATALOG_SNAPSHOT, intern_names, load_operations
+from data_models.cyberchef_pydantic_models import build_registry, build_step_validator, load_catalog_snapshot, \
+    OperationDef
 from data_models.tools import GetOperationArgsIn, GetOperationArgsOut, ArgItem, SearchOpsOut, OperationItem, \
     BakeRecipeResponse, RecipeOp, BatchBakeRecipeResponse, ProbeIn, ProbeOut, ValidateRecipeOut, ValidateRecipeIn, \
     SuggestionItem
 
+logger = logging.getLogger(__name__)
+
 BYTE_CAP = 1_024
 DEFAULT_LIMIT = 10
 MAX_LIMIT = 20
 MAX_DESC_LEN = 240
 
 
-CyberChefRecipeOperationT: TypeAlias = BaseModel
-
-
 def _norm(s: str) -> str:
     return utils.default_process(s or "")
 
 
-def _tokens(s) -> List[str]:
-    return [t for t in _norm(s).split() if t]
-
-
-def _score_op(q: str, name: str, desc: str) -> float:
-    normalized_query, normalized_name, normalized_desc = _norm(q), _norm(name), _norm(desc)
+@lru_cache(maxsize=4096)
+def _score_op(normalized_query: str, i: int) -> float:
+    """ Score catalog entry i against a query already passed through _norm """
+    normalized_name, normalized_desc = _NORM_NAMES[i], _NORM_SUMMARIES[i]
     name_score = fuzz.WRatio(normalized_query, normalized_name)
     desc_score = max(fuzz.partial_token_set_ratio(normalized_query, normalized_desc),
                      fuzz.token_set_ratio(normalized_query, normalized_desc))
@@ -48,44 +53,95 @@ def _score_op(q: str, name: str, desc: str) -> float:
         score += 10
     if normalized_query == normalized_name:
         score += 12
-    qtok = _tokens(q)
-    ntok = set(_tokens(name))
-    if any(t in ntok for t in qtok):
+    qtok = _query_tokens(normalized_query)
+    ntok = _NAME_TOKSETS[i]
+    if not ntok.isdisjoint(qtok):
         score += 6
-    if qtok and all(t in ntok for t in qtok):
+    if qtok and ntok.issuperset(qtok):
         score += 4
     return max(0, min(100, score))
 
 
-def load_operations() -> Dict[str, Any]:
-    """ The JSON was made half manually because it is not very clean on the CyberChef side """
-    current_file = Path(__file__).resolve()
-    current_dir = current_file.parent
-    with open(os.path.join(current_dir, 'utils', 'js', 'operations.json')) as f:
-        return json.load(f)
+@lru_cache(maxsize=512)
+def _query_tokens(normalized_query: str) -> frozenset:
+    return frozenset(normalized_query.split())
+
+
+def _char_mask(s: str) -> int:
+    """ 64-bucket bitmap of the characters in s, all whitespace in the bucket of ' ' (tokenizers split on any) """
+    mask = 0
+    for c in s:
+        mask |= 1 << ((32 if c.isspace() else ord(c)) & 63)
+    return mask
 
 
-CYBERCHEF_OPERATIONS = load_operations()
+def _summary(desc: str) -> str:
+    desc = desc.strip()
+    if len(desc) > MAX_DESC_LEN:
+        desc = desc[:MAX_DESC_LEN - 1] + "…"
+    return desc
+
+
+def load_catalog() -> Tuple[Dict[str, Any], Dict[str, OperationDef]]:
+    """ Raw operations plus their OperationDefs, from the snapshot if it is fresh, else built from the JSON """
+    snapshot = load_catalog_snapshot(CATALOG_SNAPSHOT, CATALOG_JSON)
+    if snapshot is not None:
+        operations, op_registry = snapshot
+        return intern_names(operations), intern_names(op_registry)
+    operations = load_operations()
+    return operations, build_registry(operations)
+
+
+CYBERCHEF_OPERATIONS, _OP_REGISTRY = load_catalog()
+
+# Search corpus, built once since the catalog does not change after startup. Fuzzy extraction runs on the raw
+# names/descriptions, scoring on the normalized names and (truncated) summaries
+_NAMES: List[str] = list(CYBERCHEF_OPERATIONS.keys())
+_DESCS: List[str] = [str(CYBERCHEF_OPERATIONS[n].get("description", "")) for n in _NAMES]
+_SUMMARIES: List[str] = [_summary(d) for d in _DESCS]
+_CATEGORIES: List[str] = [str(CYBERCHEF_OPERATIONS[n].get("module", "")).strip() for n in _NAMES]
+_NORM_NAMES: List[str] = [_norm(n) for n in _NAMES]
+_NORM_SUMMARIES: List[str] = [_norm(d) for d in _SUMMARIES]
+_NAME_TOKSETS: List[frozenset] = [frozenset(n.split()) for n in _NORM_NAMES]
+_NAME_TO_IDX: Dict[str, int] = {n: i for i, n in enumerate(_NAMES)}
+_NAME_CHARMASKS = np.array([_char_mask(n) for n in _NAMES], dtype=np.uint64)
+_DESC_CHARMASKS = np.array([_char_mask(d) for d in _DESCS], dtype=np.uint64)
 
 # Defaults (can be overridden via CLI args)
 DEFAULT_API_URL = "http://localhost:3000/"
 DEFAULT_HOST = "127.0.0.1"
 DEFAULT_PORT = 3002
+DEFAULT_API_TIMEOUT = 30.0
+
+
+def _non_negative_float(value: str) -> float:
+    """ --api-timeout type: requests would only reject a negative or non-finite timeout on the first call """
+    try:
+        seconds = float(value)
+    except ValueError:
+        seconds = -1.0
+    if not 0 <= seconds < float("inf"):
+        raise argparse.ArgumentTypeError(f"must be a non-negative number of seconds, got {value!r}")
+    return seconds
+
 
 # Parse CLI args early so we can construct MCP with the right host/port before decorators run
 _parser = argparse.ArgumentParser(add_help=False)
 _parser.add_argument("--api-url", dest="api_url", default=DEFAULT_API_URL)
 _parser.add_argument("--host", dest="host", default=DEFAULT_HOST)
 _parser.add_argument("--port", dest="port", type=int, default=DEFAULT_PORT)
+_parser.add_argument("--api-timeout", dest="api_timeout", type=_non_negative_float, default=DEFAULT_API_TIMEOUT)
 # Use parse_known_args to avoid errors if upstream adds extra args
 _args, _unknown = _parser.parse_known_args(sys.argv[1:])
 
 CYBERCHEF_API_URL = _args.api_url
+API_READ_TIMEOUT = _args.api_timeout
 CYBERCHEF_ALLOWED_CATEGORIES = {'Encodings', 'Serialise', 'Default', 'PublicKey', 'Hashing', 'PGP', 'Ciphers',
                                 'Shellcode', 'Jq', 'Handlebars', 'Yara', 'Regex', 'Crypto',
                                 'Compression', 'URL', 'Code', 'UserAgent', 'Diff', 'Protobuf'}
 
-CyberChefRecipeOperation = load_definitions(CYBERCHEF_OPERATIONS)
+# Validates one {op, args} step against the catalog and returns it as a plain dict, ready to send to the API
+validate_step = build_step_validator(_OP_REGISTRY).validate_python
 
 # Create an MCP server with CLI-provided host/port
 mcp = FastMCP("CyberChef MCP Server",
@@ -94,6 +150,41 @@ mcp = FastMCP("CyberChef MCP Server",
               )
 
 
+# One pooled session for all API calls so bakes reuse their keep-alive connections. Retry only covers failed connects
+# (urllib3 does not resend a POST after it was sent). Connects time out after API_CONNECT_TIMEOUT seconds, responses
+# after API_READ_TIMEOUT (--api-timeout, 0 waits forever); endpoints in UNTIMED_ENDPOINTS may take as long as they need
+API_CONNECT_TIMEOUT = 3
+UNTIMED_ENDPOINTS = frozenset({"magic"})  # intensive mode is documented to take considerably longer
+BATCH_FALLBACK_STATUSES = frozenset({404, 405})  # /batch/bake is missing, not failing
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=Retry(total=2, backoff_factor=0.1))
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.headers.update({
+    "Accept": "application/json",
+    "Content-Type": "application/json"
+})
+
+
+# Most bake results only depend on input and recipe, so identical requests are answered from memory. Not cached:
+# magic (slow, and treated as exploratory), recipes using an op whose output changes between runs (random values,
+# keys, time, randomized padding/IVs/salts, archive timestamps), request bodies over RESPONSE_CACHE_MAX_PAYLOAD
+# bytes and responses over RESPONSE_CACHE_MAX_RESPONSE bytes
+UNCACHED_ENDPOINTS = frozenset({"magic"})
+NON_DETERMINISTIC_OPS = frozenset({
+    "Generate UUID", "Generate RSA Key Pair", "Generate ECDSA Key Pair", "Generate PGP Key Pair",
+    "Pseudo-Random Number Generator", "XKCD Random Number", "Get Time", "Generate TOTP", "Generate Lorem Ipsum",
+    "Shuffle", "RSA Encrypt", "RSA Sign", "ECDSA Sign", "PGP Encrypt", "PGP Encrypt and Sign", "SM2 Encrypt",
+    "Fernet Encrypt", "CipherSaber2 Encrypt", "Bcrypt", "JWT Sign", "Gzip", "Zip", "Tar",
+})
+RESPONSE_CACHE_SIZE = 256
+RESPONSE_CACHE_MAX_PAYLOAD = 64 * 1024
+RESPONSE_CACHE_MAX_RESPONSE = 64 * 1024
+# (API URL, exact request body) -> response body, least recently used first
+_RESPONSE_CACHE: "OrderedDict[Tuple[str, bytes], bytes]" = OrderedDict()
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+
 def create_api_request(endpoint: str, request_data: dict) -> dict:
     """
     Send a POST request to one of the CyberChef API endpoints to process request data and retrieve the response
@@ -103,32 +194,91 @@ def create_api_request(endpoint: str, request_data: dict) -> dict:
     :return: dict object of response data
     """
     api_url = f"{CYBERCHEF_API_URL}{endpoint}"
-    request_headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json"
-    }
 
     try:
-        print(f"Attempting to send POST request to {api_url}")
-        response = requests.post(
-            url=api_url,
-            headers=request_headers,
-            json=request_data
-        )
-        response.raise_for_status()
-        return response.json()
-    except HTTPError as req_exc:
-        print(f"Exception raised during HTTP POST request to {api_url} - {req_exc}")
-        return {"error": f"Exception raised during HTTP POST request to {api_url} - {req_exc}"}
+        payload = _encode_request(request_data)
+    except (TypeError, ValueError) as enc_exc:
+        logger.warning("Could not serialize the request to %s - %s", api_url, enc_exc)
+        return {"error": f"Could not serialize the request to {api_url} - {enc_exc}"}
+
+    try:
+        timeout = (API_CONNECT_TIMEOUT, None if endpoint in UNTIMED_ENDPOINTS else API_READ_TIMEOUT or None)
+        if _cacheable(endpoint, request_data, payload):
+            content = _post_cached(api_url, payload, timeout)
+        else:
+            content = _post(api_url, payload, timeout)
+        return orjson.loads(content)
+    except (requests.RequestException, orjson.JSONDecodeError) as req_exc:
+        logger.warning("Exception raised during HTTP POST request to %s - %s", api_url, req_exc)
+        error: Dict[str, Any] = {"error": f"Exception raised during HTTP POST request to {api_url} - {req_exc}"}
+        if isinstance(req_exc, requests.HTTPError) and req_exc.response is not None:
+            error["status"] = req_exc.response.status_code
+        return error
 
 
+def _encode_request(request_data: dict) -> bytes:
+    try:
+        return orjson.dumps(request_data)
+    except orjson.JSONEncodeError:
+        # orjson only takes 64-bit integers (and str keys); number args can be larger, which stdlib json handles
+        return json.dumps(request_data).encode("utf-8")
+
+
+def _post(api_url: str, payload: bytes, timeout: Tuple[float, Optional[float]]) -> bytes:
+    """ Raw response body of a successful POST; failures raise and so never end up in the response cache """
+    logger.debug("Attempting to send POST request to %s", api_url)
+    response = _SESSION.post(
+        url=api_url,
+        data=payload,
+        timeout=timeout
+    )
+    response.raise_for_status()
+    return response.content
+
+
+def _cacheable(endpoint: str, request_data: dict, payload: bytes) -> bool:
+    if endpoint in UNCACHED_ENDPOINTS or len(payload) > RESPONSE_CACHE_MAX_PAYLOAD:
+        return False
+    recipe = request_data.get("recipe") or []
+    return not any(isinstance(step, dict) and step.get("op") in NON_DETERMINISTIC_OPS for step in recipe)
+
+
+def _post_cached(api_url: str, payload: bytes, timeout: Tuple[float, Optional[float]]) -> bytes:
+    """ _post through the response cache, keyed on the exact request body (so same key order too) """
+    key = (api_url, payload)
+    with _RESPONSE_CACHE_LOCK:
+        content = _RESPONSE_CACHE.get(key)
+        if content is not None:
+            _RESPONSE_CACHE.move_to_end(key)
+            return content
+    content = _post(api_url, payload, timeout)
+    if len(content) <= RESPONSE_CACHE_MAX_RESPONSE:
+        with _RESPONSE_CACHE_LOCK:
+            _RESPONSE_CACHE[key] = content
+            _RESPONSE_CACHE.move_to_end(key)
+            if len(_RESPONSE_CACHE) > RESPONSE_CACHE_SIZE:
+                _RESPONSE_CACHE.popitem(last=False)
+    return content
+
+
+# ASCII letters and digits to lower case, every other ASCII character to "-"
+_ASCII_SLUG_TABLE = str.maketrans({chr(c): chr(c).lower() if chr(c).isalnum() else "-" for c in range(128)})
+
+
+# Bounded rather than unbounded: besides the ~1k catalog options, user supplied values are slugged too
+@lru_cache(maxsize=4096)
 def _slug(s: str) -> str:
     s = s.split(":")[0]  # drop alphabet preview
     s = s.split("(")[0]  # drop RFC etc
+    if s.isascii():
+        return s.translate(_ASCII_SLUG_TABLE).strip("-")
+    # Per character: str.lower() on the whole string would apply context rules such as the Greek final sigma
     return "".join(ch.lower() if ch.isalnum() else "-" for ch in s).strip("-")
 
 
+@lru_cache(maxsize=2048)
 def _enum_table(op: str, arg_name: str) -> Dict[str, str]:
+    """ slug -> label for one arg; the returned dict is shared between calls and must not be modified """
     op_def = CYBERCHEF_OPERATIONS.get(op) or {}
     for a in op_def.get("args", []):
         if a.get("name") == arg_name:
@@ -152,16 +302,33 @@ def _enum_table(op: str, arg_name: str) -> Dict[str, str]:
 def _normalize_enum(op: str, arg_name: str, val: Any) -> Any:
     if not isinstance(val, str):
         return val
+    return _normalize_enum_str(op, arg_name, val)
+
+
+@lru_cache(maxsize=1024)
+def _normalize_enum_str(op: str, arg_name: str, val: str) -> str:
     tab = _enum_table(op, arg_name)
     key = _slug(val)
     if key in tab:
         return tab[key]
-    for k, v in tab.items():
-        if k.startswith(key):
-            return v
+    # Prefix match: the slugs starting with key are one run in sorted order, the first of them in table order wins
+    slugs, positions = _enum_prefix_index(op, arg_name)
+    lo = hi = bisect_left(slugs, key)
+    while hi < len(slugs) and slugs[hi].startswith(key):
+        hi += 1
+    if lo < hi:
+        return tab[slugs[min(range(lo, hi), key=positions.__getitem__)]]
     return val
 
 
+@lru_cache(maxsize=2048)
+def _enum_prefix_index(op: str, arg_name: str) -> Tuple[List[str], List[int]]:
+    """ The slugs of _enum_table(op, arg_name) sorted for bisect, and the position of each one in that table """
+    order = {slug: pos for pos, slug in enumerate(_enum_table(op, arg_name))}
+    slugs = sorted(order)
+    return slugs, [order[slug] for slug in slugs]
+
+
 @mcp.tool()
 def get_operation_args(req: GetOperationArgsIn) -> GetOperationArgsOut:
     """
@@ -213,50 +380,102 @@ def search_operations(
     q = (query or "").strip()
     limit = max(1, min(int(limit or DEFAULT_LIMIT), MAX_LIMIT))
 
-    names = list(CYBERCHEF_OPERATIONS.keys())
-    descs = [str(CYBERCHEF_OPERATIONS[n].get("description", "")) for n in names]
-    name_matches = process.extract(q, names, scorer=fuzz.WRatio, limit=limit * 2) if q else []
-    desc_matches = process.extract(q, descs, scorer=fuzz.partial_token_set_ratio, limit=limit * 2) if q else []
-
-    idxs = {i for _, _, i in name_matches} | {i for _, _, i in desc_matches}
-    if not q:
-        idxs = set(range(min(limit * 2, len(names))))
-
-    items: List[Dict[str, Any]] = []
+    items, trunc, size = _search_impl(q, limit, include_args)
+    logger.debug("Returned %d Bytes", size)
+    return SearchOpsOut(total=len(items), items=[OperationItem(**dict(x)) for x in items], truncated=trunc)
+
+
+def _fuzzy_scores(q: str, q_mask: np.uint64, corpus: List[str], masks: np.ndarray, scorer: Callable) -> np.ndarray:
+    """ Scores of q against every corpus entry. Entries sharing no character with q cannot score above 0 with a
+    rapidfuzz ratio, so they are left at 0 without being scored """
+    keep = np.flatnonzero(masks & q_mask)
+    if len(keep) == len(corpus):
+        return process.cdist([q], corpus, scorer=scorer, dtype=np.float64, workers=-1)[0]
+    scores = np.zeros(len(corpus))
+    if len(keep):
+        scores[keep] = process.cdist([q], [corpus[i] for i in keep], scorer=scorer, dtype=np.float64, workers=-1)[0]
+    return scores
+
+
+def _top_indices(scores: np.ndarray, k: int) -> List[int]:
+    """ Indices of the k best scores, unordered; ties at the cut go to the lowest indices (as with process.extract) """
+    if k >= len(scores):
+        return list(range(len(scores)))
+    kth = np.partition(scores, len(scores) - k)[len(scores) - k]  # k-th best score, O(N) instead of a full sort
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[:k - len(above)]
+    return above.tolist() + ties.tolist()
+
+
+# Ranked items as tuples of key/value pairs (so a cached result cannot be mutated), truncated flag, response size
+_SearchResult = Tuple[Tuple[Tuple[Tuple[str, Any], ...], ...], bool, int]
+
+
+@lru_cache(maxsize=512)
+def _search_impl(q: str, limit: int, include_args: bool) -> _SearchResult:
+    """ Cached body of search_operations for an already stripped query and clamped limit """
+    if q:
+        q_mask = np.uint64(_char_mask(q))
+        name_scores = _fuzzy_scores(q, q_mask, _NAMES, _NAME_CHARMASKS, fuzz.WRatio)
+        desc_scores = _fuzzy_scores(q, q_mask, _DESCS, _DESC_CHARMASKS, fuzz.partial_token_set_ratio)
+        idxs = set(_top_indices(name_scores, limit * 2)) | set(_top_indices(desc_scores, limit * 2))
+    else:
+        idxs = set(range(min(limit * 2, len(_NAMES))))
+
+    # Rank (score, index) pairs first; only the top `limit` become item dicts
+    q_norm = _norm(q)
+    ranked: List[Tuple[int, int]] = []
     for i in idxs:
-        name = names[i]
-        op = CYBERCHEF_OPERATIONS[name]
-        cat = str(op.get("module", "")).strip()
+        cat = _CATEGORIES[i]
         if CYBERCHEF_ALLOWED_CATEGORIES and cat and cat not in CYBERCHEF_ALLOWED_CATEGORIES:
             continue
-        desc = str(op.get("description", "")).strip()
-        if len(desc) > MAX_DESC_LEN:
-            desc = desc[:MAX_DESC_LEN - 1] + "…"
-        score = int(_score_op(q, name, desc))
-        item = {
-            "name": name,
-            "summary": desc,
-            "category": cat or None,
-            "score": score,
-            "inputType": op.get("inputType", "") or None,
-            "outputType": op.get("outputType", "") or None,
-        }
-        if include_args:
-            item["args"] = op.get("args", [])
-        items.append(item)
-
-    items.sort(key=lambda x: (-x["score"], x["name"]))
-    items = items[:limit]
-
-    out_preview = {"total": len(items), "items": items}
-    blob = json.dumps(out_preview, ensure_ascii=False).encode("utf-8")
+        ranked.append((int(_score_op(q_norm, i)), i))
+    ranked.sort(key=lambda x: (-x[0], _NAMES[x[1]]))
+
+    items, trunc, size = _byte_capped(_search_item(score, i, include_args) for score, i in ranked[:limit])
+    return tuple(tuple(x.items()) for x in items), trunc, size
+
+
+def _search_item(score: int, i: int, include_args: bool) -> Dict[str, Any]:
+    op = CYBERCHEF_OPERATIONS[_NAMES[i]]
+    item = {
+        "name": _NAMES[i],
+        "summary": _SUMMARIES[i],
+        "category": _CATEGORIES[i] or None,
+        "score": score,
+        "inputType": op.get("inputType", "") or None,
+        "outputType": op.get("outputType", "") or None,
+    }
+    if include_args:
+        item["args"] = op.get("args", [])
+    return item
+
+
+# Bytes of orjson.dumps({"total": n, "items": [...]}) around the number and the items, and of the truncated flag key
+_ENVELOPE_BYTES = len(orjson.dumps({"total": 0, "items": []})) - 1
+_TRUNCATED_KEY_BYTES = len(b',"truncated":')
+
+
+def _byte_capped(items: Iterable[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], bool, int]:
+    """
+    The leading items that fit in BYTE_CAP when sent as {"total", "items"} (at least one), whether items were cut,
+    and the UTF-8 size of the response including the truncated flag. Each item is serialized once and the rest of the
+    compact orjson layout is counted instead of re-serialized. Items are consumed lazily, so nothing after the first
+    one that does not fit is produced
+    """
+    body = 0  # items plus their "," separators
+    kept: List[Dict[str, Any]] = []
     trunc = False
-    if len(blob) > BYTE_CAP:
-        while items and len(items) > 1 and len(json.dumps({"total": len(items), "items": items}, ensure_ascii=False).encode("utf-8")) > BYTE_CAP:
-            items.pop()
-        trunc = True
-    print(f"Returned {len(json.dumps({'total': len(items), 'items': items, 'truncated': trunc}, ensure_ascii=False).encode('utf-8'))} Bytes")
-    return SearchOpsOut(total=len(items), items=[OperationItem(**x) for x in items], truncated=trunc)
+    for n, item in enumerate(items, 1):
+        grown = body + len(orjson.dumps(item)) + (1 if n > 1 else 0)
+        if n > 1 and _ENVELOPE_BYTES + len(str(n)) + grown > BYTE_CAP:
+            trunc = True
+            break
+        body = grown
+        kept.append(item)
+    size = _ENVELOPE_BYTES + len(str(len(kept))) + body
+    trunc = trunc or size > BYTE_CAP
+    return kept, trunc, size + _TRUNCATED_KEY_BYTES + len(orjson.dumps(trunc))
 
 
 @mcp.tool()
@@ -278,7 +497,7 @@ def bake_recipe(input_data: str, recipe: List[Dict[str, Any]]) -> BakeRecipeResp
     if errors:
         return BakeRecipeResponse(ok=False, errors=errors, warnings=warnings)
 
-    request_data = {"input": input_data, "recipe": [op.model_dump() for op in validated]}
+    request_data = {"input": input_data, "recipe": validated}
     response_data = create_api_request(endpoint="bake", request_data=request_data)
 
     if isinstance(response_data, dict) and "type" in response_data and "value" in response_data:
@@ -286,7 +505,7 @@ def bake_recipe(input_data: str, recipe: List[Dict[str, Any]]) -> BakeRecipeResp
         if t == "byteArray":
             # noinspection PyBroadException
             try:
-                out = bytes(v).decode("utf-8", "ignore")
+                out = bytearray(v).decode("utf-8", "ignore")
             except Exception:
                 out = ""
             return BakeRecipeResponse(ok=True, output=out, type=t, warnings=warnings)
@@ -303,27 +522,57 @@ def bake_recipe(input_data: str, recipe: List[Dict[str, Any]]) -> BakeRecipeResp
     return BakeRecipeResponse(ok=True, output=str(response_data))
 
 
-def _validate_recipe(recipe: list[dict[str, Any]]) -> tuple[list[str], list[CyberChefRecipeOperationT], list[str]]:
+def _validate_recipe(recipe: list[dict[str, Any]]) -> tuple[list[str], list[dict[str, Any]], list[str]]:
+    """ errors, validated steps ready for the API and warnings; memoized on the recipe's JSON text """
+    try:
+        recipe_json = json.dumps(recipe)
+    except (TypeError, ValueError):  # not JSON data, so it cannot be a cache key either
+        return _validate_recipe_uncached(recipe)
+    errors, validated, warnings = _validate_recipe_cached(recipe_json)
+    return list(errors), list(validated), list(warnings)
+
+
+@lru_cache(maxsize=256)
+def _validate_recipe_cached(recipe_json: str) -> tuple[tuple[str, ...], tuple[dict[str, Any], ...], tuple[str, ...]]:
+    # Tool arguments arrive as decoded JSON, so re-loading the key yields an equal recipe
+    errors, validated, warnings = _validate_recipe_uncached(json.loads(recipe_json))
+    return tuple(errors), tuple(validated), tuple(warnings)
+
+
+def _validate_recipe_uncached(recipe: list[dict[str, Any]]) -> tuple[list[str], list[dict[str, Any]], list[str]]:
     errors: List[str] = []
     warnings: List[str] = []
-    validated: List[CyberChefRecipeOperation] = []
+    validated: List[Dict[str, Any]] = []
     for i, operation in enumerate(recipe):
         try:
-            op_obj = RecipeOp(**operation)
-            if isinstance(op_obj.args, dict):
-                op_obj.args = {k: _normalize_enum(op_obj.op, k, v) for k, v in op_obj.args.items()}
-            validated.append(CyberChefRecipeOperation(**op_obj.model_dump()))
+            if isinstance(operation, dict) and type(operation.get("op")) is str \
+                    and type(operation.get("args", {})) is dict:
+                # RecipeOp would take this step over unchanged; validate_step checks it against the catalog anyway
+                op, args = operation["op"], operation.get("args", {})
+            else:
+                op_obj = RecipeOp(**operation)  # malformed steps: coerce or fail with the RecipeOp error as before
+                op, args = op_obj.op, op_obj.args
+            args = {k: _normalize_enum(op, k, v) for k, v in args.items()}
+            validated.append(validate_step({"op": op, "args": args}))
         except ValidationError as e:
             op_name = operation.get("op") if isinstance(operation, dict) else None
             expected_args = [a.get("name") for a in CYBERCHEF_OPERATIONS.get(op_name, {}).get("args", [])]
-            similar = [c[0] for c in
-                       process.extract(op_name, list(CYBERCHEF_OPERATIONS.keys()), limit=3)] if op_name else []
+            similar = [c[0] for c in process.extract(op_name, _NAMES, limit=3)] if op_name else []
             errors.append(
                 f"Step {i} invalid for op='{op_name}'. Expected arg keys: {expected_args}. Similar op names: {similar}. Details: {str(e).strip()}"
             )
     return errors, validated, warnings
 
 
+def _bake_each(inputs: List[str], recipe: List[Dict[str, Any]]) -> List[dict]:
+    """ One /bake request per input over the pooled session, responses in input order """
+    if not inputs:
+        return []
+    with ThreadPoolExecutor(max_workers=min(len(inputs), 16), thread_name_prefix="bake") as executor:
+        return list(executor.map(
+            lambda x: create_api_request(endpoint="bake", request_data={"input": x, "recipe": recipe}), inputs))
+
+
 @mcp.tool()
 def batch_bake_recipe(batch_input_data: List[str], recipe: List[Dict[str, Any]]) -> BatchBakeRecipeResponse:
     """Execute one recipe on multiple inputs. Returns {results: List[BakeRecipeResponse]}"""
@@ -332,17 +581,25 @@ def batch_bake_recipe(batch_input_data: List[str], recipe: List[Dict[str, Any]])
     if errors:
         return BatchBakeRecipeResponse(results=[BakeRecipeResponse(ok=False, errors=errors)])
 
-    request_data = {"input": batch_input_data, "recipe": [op.model_dump() for op in validated]}
+    request_data = {"input": batch_input_data, "recipe": validated}
     response_data = create_api_request(endpoint="batch/bake", request_data=request_data)
+    responses: List[Any]
+    if isinstance(response_data, dict) and response_data.get("status") in BATCH_FALLBACK_STATUSES:
+        # a CyberChef server without /batch/bake: bake the inputs one by one instead, concurrently
+        responses = _bake_each(batch_input_data, validated)
+    elif isinstance(response_data, dict) and "error" in response_data:
+        return BatchBakeRecipeResponse(results=[BakeRecipeResponse(ok=False, errors=[str(response_data["error"])])])
+    else:
+        responses = response_data if isinstance(response_data, list) else []
 
     results: List[BakeRecipeResponse] = []
-    for response in (response_data or []):
+    for response in responses:
         if isinstance(response, dict) and "type" in response and "value" in response:
             t, v = response["type"], response["value"]
             if t == "byteArray":
                 # noinspection PyBroadException
                 try:
-                    out = bytes(v).decode("utf-8", "ignore")
+                    out = bytearray(v).decode("utf-8", "ignore")
                 except Exception:
                     out = ""
                 results.append(BakeRecipeResponse(ok=True, output=out, type=t))
@@ -360,6 +617,17 @@ def batch_bake_recipe(batch_input_data: List[str], recipe: List[Dict[str, Any]])
     return BatchBakeRecipeResponse(results=results)
 
 
+# Every byte except the control characters (tab, newlines and carriage return are allowed) and DEL
+_TEXT_BYTES = bytes(c for c in range(256) if not (c < 9 or (13 < c < 32) or c == 127))
+
+
+def _looks_textlike(b: bytes) -> bool:
+    if not b:
+        return False
+    bad = len(b.translate(None, _TEXT_BYTES))  # deleting the text bytes in C leaves the bad ones
+    return bad / len(b) < 0.05
+
+
 @mcp.tool()
 def cyberchef_probe(req: ProbeIn) -> ProbeOut:
     """
@@ -376,18 +644,19 @@ def cyberchef_probe(req: ProbeIn) -> ProbeOut:
         [{"op": "From Binary", "args": {"Delimiter": "Space", "Byte Length": 8}}],
     ]
 
-    def _looks_textlike(b: bytes) -> bool:
-        if not b:
-            return False
-        bad = sum(c < 9 or (13 < c < 32) or c == 127 for c in b)
-        return bad / len(b) < 0.05
-
     norm_input = req.raw_input
 
-    for r in probes:
-        res = bake_recipe(input_data=norm_input, recipe=r)
-        if res.ok and res.output and _looks_textlike(res.output.encode("utf-8", "ignore")):
-            return ProbeOut(ok=True, recipe=[RecipeOp(**x) for x in r], output=res.output)
+    # All probes are baked concurrently but checked in list order, so the first textlike probe still wins.
+    # Pending probes are cancelled once that is decided; running ones finish in the background
+    executor = ThreadPoolExecutor(max_workers=len(probes), thread_name_prefix="probe")
+    try:
+        futures = [executor.submit(bake_recipe, input_data=norm_input, recipe=r) for r in probes]
+        for r, future in zip(probes, futures):
+            res = future.result()
+            if res.ok and res.output and _looks_textlike(res.output.encode("utf-8", "ignore")):
+                return ProbeOut(ok=True, recipe=[RecipeOp(**x) for x in r], output=res.output)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
     return ProbeOut(ok=False, error="no simple probe succeeded")
 
 
@@ -451,7 +720,7 @@ def validate_recipe(req: ValidateRecipeIn) -> ValidateRecipeOut:
             errors.append(f"Step {i} missing 'op' name")
             continue
         if name not in CYBERCHEF_OPERATIONS:
-            cands = [c[0] for c in process.extract(name, list(CYBERCHEF_OPERATIONS.keys()), limit=5)]
+            cands = [c[0] for c in process.extract(name, _NAMES, limit=5)]
             suggestions.append(SuggestionItem(index=i, op=name, candidates=cands))
             continue
         expected = [a.get("name") for a in CYBERCHEF_OPERATIONS[name].get("args", [])]
@@ -508,10 +777,15 @@ def main():
                              help=f"Server bind host (default: {DEFAULT_HOST})")
     full_parser.add_argument("--port", dest="port", type=int, default=DEFAULT_PORT,
                              help=f"Server port (default: {DEFAULT_PORT})")
+    full_parser.add_argument("--api-timeout", dest="api_timeout", type=_non_negative_float,
+                             default=DEFAULT_API_TIMEOUT,
+                             help="Seconds to wait for a CyberChef API response, 0 for no limit; magic is never "
+                                  f"cut off (default: {DEFAULT_API_TIMEOUT:g})")
     args = full_parser.parse_args(sys.argv[1:])
 
-    global CYBERCHEF_API_URL
+    global CYBERCHEF_API_URL, API_READ_TIMEOUT
     CYBERCHEF_API_URL = args.api_url
+    API_READ_TIMEOUT = args.api_timeout
 
     mcp.run(transport="streamable-http")
 
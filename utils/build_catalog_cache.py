@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prebuild utils/js/operations.pickle from utils/js/operations.json.
+
+The MCP server loads this snapshot instead of parsing and validating the JSON catalog on every start, as long as
+the snapshot is newer than the JSON. Re-run after editing operations.json (from the project root):
+
+    python -m utils.build_catalog_cache
+"""
+from data_models.catalog import CATALOG_SNAPSHOT, load_operations
+from data_models.cyberchef_pydantic_models import dump_catalog_snapshot
+
+
+def main():
+    operations = load_operations()
+    dump_catalog_snapshot(operations, CATALOG_SNAPSHOT)
+    print(f"Wrote snapshot for {len(operations)} operations to {CATALOG_SNAPSHOT}")
+
+
+if __name__ == "__main__":
+    main()